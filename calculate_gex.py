@@ -1,11 +1,13 @@
+import importlib.util
+import math
 import pandas as pd
 import numpy as np
-from scipy.stats import norm
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
 from datetime import datetime
 
+# Only checks that numba is installed; gex_kernel (and numba) are imported on first
+# use, and run_gex clears this flag if that import fails
+HAS_NUMBA = importlib.util.find_spec("numba") is not None
+
 # ===== INPUT CONSTANTS =====
 VALUATION_DATE = "2026-01-05"
 EXPIRATION_DATE = "2026-03-20"
@@ -16,6 +18,11 @@ T = 0.202739726  # Time to expiration in years
 
 # ===== END CONSTANTS =====
 
+_INV_SQRT_2PI = 0.3989422804014327  # 1 / sqrt(2 * pi)
+
+# Below this many rows thread start-up outweighs the work, so stay on NumPy
+_PARALLEL_MIN_ROWS = 4096
+
 def d1(S, K, r=0, T=0.25, sigma=0.2):
     """Calculate d1 in Black-Scholes formula"""
     return (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * np.sqrt(T))
@@ -29,33 +36,45 @@ def calculate_gamma(S, K, r=0, T=0.25, sigma=0.2):
     if T <= 0:
         return 0
     d1_val = d1(S, K, r, T, sigma)
-    gamma = norm.pdf(d1_val) / (S * sigma * np.sqrt(T))
-    return gamma
+    return _INV_SQRT_2PI * math.exp(-0.5 * d1_val * d1_val) / (S * sigma * math.sqrt(T))
+
+def gex_terms(sigma, T, mult):
+    """
+    Precompute the strike-independent pieces of the GEX formula for a fixed
+    volatility, (positive) time to expiration and multiplier.
+    
+    scale folds Gamma's 1/(S·σ·√T) normalization together with
+    Spot × (1/100) × Multiplier; the spot cancels out.
+    
+    Returns:
+        Tuple of (half_var_T, sigma_sqrt_T, scale)
+    """
+    sigma_sqrt_T = sigma * math.sqrt(T)
+    scale = _INV_SQRT_2PI * mult / (100.0 * sigma_sqrt_T)
+    return 0.5 * sigma * sigma * T, sigma_sqrt_T, scale
 
-def calculate_signed_gex(row, spot, iv, mult, t):
+def calculate_signed_gex(row, spot, half_var_T, sigma_sqrt_T, scale):
     """
     Calculate signed GEX for a single option row.
     
     GEX = Gamma × OI × Spot² × (1/100) × Multiplier
     Sign: Calls are positive, Puts are negative
+    
+    half_var_T, sigma_sqrt_T and scale come from gex_terms so they are
+    computed once per chain rather than once per row.
     """
     option_type = row['OptionType']
-    strike = str(row['Strike']).replace(',', '')
-    strike = float(strike)
-    
-    oi = str(row['OI']).replace(',', '')
-    oi = float(oi)
+    strike = float(row['Strike'])
+    oi = float(row['OI'])
     
     # Skip if OI is 0
     if oi == 0:
         return 0
     
-    # Calculate gamma
-    gamma = calculate_gamma(spot, strike, r=0, T=t, sigma=iv)
-    
     # Calculate GEX: Gamma × OI × Spot × (1/100) × Multiplier
     # Note: GEX is typically normalized per 1% move in spot
-    gex = gamma * oi * spot * (1/100) * mult
+    d1_val = (math.log(spot / strike) + half_var_T) / sigma_sqrt_T
+    gex = oi * scale * math.exp(-0.5 * d1_val * d1_val)
     
     # Apply sign: Calls positive, Puts negative
     if option_type == 'Put':
@@ -63,21 +82,78 @@ def calculate_signed_gex(row, spot, iv, mult, t):
     
     return gex
 
-def main():
-    """Main function to calculate and graph GEX"""
+def calculate_signed_gex_vectorized(K, OI, sign, S, sigma, T, mult):
+    """
+    Calculate signed GEX for every option at once using NumPy array ops.
     
-    # Read the CSV file
-    try:
-        df = pd.read_csv('data.csv')
-    except FileNotFoundError:
-        print("Error: data.csv not found. Please run parse_options_data.py first.")
-        return
+    Takes parallel float arrays of strikes, open interest and signs
+    (+1 for calls, -1 for puts) and applies the same formula as
+    calculate_signed_gex to all of them.
+    """
+    if T <= 0:
+        return np.zeros(K.shape[0])
+    
+    half_var_T, sigma_sqrt_T, scale = gex_terms(sigma, T, mult)
+    
+    # log(S / K) rather than log(S) - log(K): the two logs are nearly equal,
+    # and subtracting them in float32 throws away most of the precision
+    d1_vals = (np.log(S / K) + half_var_T) / sigma_sqrt_T
+    gex = sign * OI * (scale * np.exp(-0.5 * d1_vals * d1_vals))
     
-    # Calculate GEX for each row
-    df['GEX'] = df.apply(lambda row: calculate_signed_gex(row, SPOT, IV, MULT, T), axis=1)
+    # Skip if OI is 0
+    return np.where(OI == 0, 0.0, gex)
+
+def calculate_signed_gex_numba(K, OI, sign, S, sigma, T, mult):
+    """
+    Calculate signed GEX with the parallel Numba kernel in gex_kernel.py.
+    
+    Same inputs and results as calculate_signed_gex_vectorized; numba is
+    imported on the first call, so it must be installed.
+    """
+    from gex_kernel import signed_gex_kernel
+    
+    if T <= 0:
+        return np.zeros(K.shape[0])
+    
+    half_var_T, sigma_sqrt_T, scale = gex_terms(sigma, T, mult)
+    return signed_gex_kernel(K, OI, sign, S, half_var_T, sigma_sqrt_T, scale)
+
+def run_gex(df):
+    """
+    Calculate signed GEX for the parsed option chain, print a summary,
+    save gex_data.csv and graph GEX by strike to gex_analysis.png.
     
-    # Group by strike and sum GEX (to get net GEX at each strike)
-    gex_by_strike = df.groupby('Strike')['GEX'].sum().sort_index()
+    Expects a DataFrame with OptionType and numeric Strike/OI columns, as
+    produced by parse_options_data.run_parse. Returns it with a GEX column added.
+    """
+    df = df.copy()
+    
+    # Pull out the parallel numeric arrays the GEX kernel works on.
+    # float32 is plenty for strikes/OI and halves the memory traffic.
+    K = df['Strike'].to_numpy(dtype=np.float32)
+    OI = df['OI'].to_numpy(dtype=np.float32)
+    sign = np.where(df['OptionType'].to_numpy() == 'Put', np.float32(-1.0), np.float32(1.0))
+    spot, iv, t, mult = np.float32(SPOT), np.float32(IV), np.float32(T), np.float32(MULT)
+    
+    # Calculate GEX for each row, widening to float64 once for the totals
+    global HAS_NUMBA
+    gex = None
+    if HAS_NUMBA and K.shape[0] >= _PARALLEL_MIN_ROWS:
+        try:
+            gex = calculate_signed_gex_numba(K, OI, sign, spot, iv, t, mult)
+        except ImportError:
+            # numba is installed but fails to import (e.g. NumPy version mismatch)
+            HAS_NUMBA = False
+    if gex is None:
+        gex = calculate_signed_gex_vectorized(K, OI, sign, spot, iv, t, mult)
+    gex = gex.astype(np.float64)
+    
+    # Sum GEX per unique strike (to get net GEX at each strike)
+    valid = ~np.isnan(K)
+    unique_strikes, inverse = np.unique(K[valid], return_inverse=True)
+    gex_by_strike = np.bincount(inverse, weights=np.nan_to_num(gex[valid]), minlength=len(unique_strikes))
+    
+    df['GEX'] = gex
     
     # Print summary
     print("=" * 80)
@@ -100,13 +176,17 @@ def main():
     df_output.to_csv('gex_data.csv', index=False)
     print(f"\nDetailed GEX data saved to gex_data.csv")
     
-    # Create visualization
+    # Create visualization (matplotlib is only imported when actually plotting)
+    import matplotlib
+    matplotlib.use('Agg')  # Use non-interactive backend
+    import matplotlib.pyplot as plt
+    
     fig, axes = plt.subplots(2, 1, figsize=(14, 10))
     
     # Plot 1: Signed GEX by strike
     ax1 = axes[0]
-    colors = ['green' if x >= 0 else 'red' for x in gex_by_strike.values]
-    ax1.bar(gex_by_strike.index, gex_by_strike.values, color=colors, alpha=0.7, edgecolor='black')
+    colors = np.where(gex_by_strike >= 0, 'green', 'red')
+    ax1.bar(unique_strikes, gex_by_strike, color=colors, alpha=0.7, edgecolor='black')
     ax1.axhline(y=0, color='black', linestyle='-', linewidth=0.5)
     ax1.axvline(x=SPOT, color='blue', linestyle='--', linewidth=2, label=f'Spot: {SPOT}')
     ax1.set_xlabel('Strike Price', fontsize=12)
@@ -116,12 +196,12 @@ def main():
     ax1.legend()
     
     # Plot 2: Cumulative GEX
-    cumulative_gex = gex_by_strike.cumsum()
+    cumulative_gex = np.cumsum(gex_by_strike)
     ax2 = axes[1]
-    ax2.plot(cumulative_gex.index, cumulative_gex.values, marker='o', linewidth=2, markersize=6, color='darkblue')
+    ax2.plot(unique_strikes, cumulative_gex, marker='o', linewidth=2, markersize=6, color='darkblue')
     ax2.axhline(y=0, color='black', linestyle='-', linewidth=0.5)
     ax2.axvline(x=SPOT, color='blue', linestyle='--', linewidth=2, label=f'Spot: {SPOT}')
-    ax2.fill_between(cumulative_gex.index, cumulative_gex.values, 0, alpha=0.3)
+    ax2.fill_between(unique_strikes, cumulative_gex, 0, alpha=0.3)
     ax2.set_xlabel('Strike Price', fontsize=12)
     ax2.set_ylabel('Cumulative GEX', fontsize=12)
     ax2.set_title('Cumulative Gamma Exposure by Strike', fontsize=14, fontweight='bold')
@@ -131,6 +211,20 @@ def main():
     plt.tight_layout()
     plt.savefig('gex_analysis.png', dpi=300, bbox_inches='tight')
     print(f"GEX chart saved to gex_analysis.png")
+    
+    return df
+
+def main():
+    """Main function to calculate and graph GEX"""
+    
+    # Read the CSV file
+    try:
+        df = pd.read_csv('data.csv', thousands=',')
+    except FileNotFoundError:
+        print("Error: data.csv not found. Please run parse_options_data.py first.")
+        return
+    
+    run_gex(df)
 
 if __name__ == "__main__":
     main()
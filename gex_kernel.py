@@ -0,0 +1,24 @@
+import math
+import numpy as np
+from numba import njit, prange
+
+# Kept out of calculate_gex.py so numba is only imported for chains large enough to use it
+
+# No nnan/ninf fastmath flags: coerced Strike/OI values can be NaN, and
+# error_model='numpy' lets a zero strike give inf/0 instead of raising
+@njit(parallel=True, cache=True, fastmath={'contract', 'arcp', 'reassoc'}, error_model='numpy')
+def signed_gex_kernel(K, OI, sign, S, half_var_T, sigma_sqrt_T, scale):
+    """
+    Compiled loop computing signed GEX for each strike/OI pair, split across cores.
+    
+    half_var_T, sigma_sqrt_T and scale are the strike-independent terms
+    from calculate_gex.gex_terms.
+    """
+    out = np.empty_like(K)
+    for i in prange(K.shape[0]):
+        if OI[i] == 0.0:
+            out[i] = 0.0
+            continue
+        d1_val = (math.log(S / K[i]) + half_var_T) / sigma_sqrt_T
+        out[i] = sign[i] * OI[i] * scale * math.exp(-0.5 * d1_val * d1_val)
+    return out
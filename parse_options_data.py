@@ -1,27 +1,43 @@
+import importlib.util
 import pandas as pd
+import numpy as np
 import os
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+
+# Rust-based Excel reader pandas can use (pandas >= 2.2); only checked, not imported
+HAS_CALAMINE = importlib.util.find_spec("python_calamine") is not None
 
 # User-defined constant for input file
 INPUT_FILE = "NQH6 - 2026-01-05.xls"
 
-def find_table_boundaries(df: pd.DataFrame) -> List[Tuple[int, int]]:
+def get_first_column(df: pd.DataFrame) -> np.ndarray:
+    """Return column 0 as a NumPy array of stripped strings, with "" for missing cells."""
+    return df.iloc[:, 0].astype('string').fillna('').str.strip().to_numpy(dtype=str)
+
+def find_table_ends(first_col: np.ndarray) -> np.ndarray:
+    """Return the row indices whose first column is "TOTALS" or a "No month data" marker."""
+    end_mask = (first_col == "TOTALS") | (np.char.find(first_col, "No month data") >= 0)
+    return np.flatnonzero(end_mask)
+
+def find_table_boundaries(df: pd.DataFrame, first_col: Optional[np.ndarray] = None) -> List[Tuple[int, int]]:
     """
     Find the boundaries of all tables in the dataframe.
     Tables end with "TOTALS" or "No month data for this option type" in the first column.
     
+    Args:
+        df: Full dataframe
+        first_col: Column 0 from get_first_column, if already computed
+    
     Returns:
         List of tuples containing (start_row, end_row) for each table
     """
-    table_boundaries = []
-    table_start = 0
+    if first_col is None:
+        first_col = get_first_column(df)
+    table_ends = find_table_ends(first_col)
     
-    for idx, row in df.iterrows():
-        first_col_value = str(row.iloc[0]).strip() if pd.notna(row.iloc[0]) else ""
-        
-        if first_col_value == "TOTALS" or "No month data" in first_col_value:
-            table_boundaries.append((table_start, idx))
-            table_start = idx + 1
+    table_starts = np.concatenate(([0], table_ends[:-1] + 1))
+    table_boundaries = list(zip(table_starts.tolist(), table_ends.tolist()))
+    table_start = int(table_ends[-1]) + 1 if len(table_ends) else 0
     
     # Handle case where last table doesn't end with TOTALS
     if table_start < len(df):
@@ -38,12 +54,42 @@ def find_header_row(df: pd.DataFrame, start_row: int, end_row: int) -> int:
     Find the row containing actual column headers by looking for 'Month' column.
     Returns the row index of the header row.
     """
-    for idx in range(start_row, end_row + 1):
-        row_values = [str(val).strip().lower() if pd.notna(val) else "" for val in df.iloc[idx]]
-        if any("month" == val for val in row_values):
-            return idx
+    values = df.iloc[start_row:end_row + 1].to_numpy(dtype=str)
+    is_header = (np.char.lower(np.char.strip(values)) == "month").any(axis=1)
+    if is_header.any():
+        return start_row + int(np.argmax(is_header))
     return start_row  # Fallback to start row if no header found
 
+def build_title_index(df: pd.DataFrame, first_col: Optional[np.ndarray] = None) -> Dict[str, Tuple[int, int]]:
+    """
+    Map each first-column value (e.g. "MAR 26 Calls") to the row it appears on
+    and the last data row of the table it heads.
+    
+    Args:
+        df: Full dataframe
+        first_col: Column 0 from get_first_column, if already computed
+    
+    Returns:
+        Dict of title -> (title_row, table_end)
+    """
+    if first_col is None:
+        first_col = get_first_column(df)
+    table_ends = find_table_ends(first_col)
+    
+    # Each table runs up to the row before the first end marker below its title,
+    # or to the bottom of the sheet if there is none
+    end_markers = np.append(table_ends, len(df))
+    title_rows = np.setdiff1d(np.flatnonzero(first_col != ""), table_ends)
+    title_ends = end_markers[np.searchsorted(table_ends, title_rows, side='right')] - 1
+    
+    # Insert bottom-up so the first occurrence of a repeated title is the one kept
+    title_index = {}
+    titles = first_col[title_rows].tolist()
+    for title, idx, table_end in zip(titles[::-1], title_rows[::-1].tolist(), title_ends[::-1].tolist()):
+        title_index[title] = (idx, table_end)
+    
+    return title_index
+
 def get_months_from_first_table(first_table: pd.DataFrame) -> List[str]:
     """
     Extract available months from the first table.
@@ -59,26 +105,36 @@ def get_months_from_first_table(first_table: pd.DataFrame) -> List[str]:
     if month_col is None:
         raise ValueError(f"Could not find 'month' column in first table. Available columns: {first_table.columns.tolist()}")
     
-    months = first_table[month_col].dropna().unique().tolist()
+    months = first_table[month_col].dropna().astype(str).str.strip()
     # Filter out TOTALS rows
-    months = [str(m).strip() for m in months if str(m).strip().upper() != "TOTALS"]
-    return months
+    return months[months.str.upper() != "TOTALS"].unique().tolist()
 
-def parse_options_file(filepath: str) -> Tuple[List[str], pd.DataFrame]:
+def parse_options_file(filepath: str) -> Tuple[List[str], pd.DataFrame, Dict[str, Tuple[int, int]]]:
     """
     Parse the options data file and extract months and raw data.
     
     Returns:
-        Tuple of (available_months, full_dataframe)
+        Tuple of (available_months, full_dataframe, title_index)
     """
     if not os.path.exists(filepath):
         raise FileNotFoundError(f"File not found: {filepath}")
     
-    # Read the Excel file
-    df = pd.read_excel(filepath, sheet_name=0, header=None)
+    # Read the Excel file, preferring the much faster calamine engine (.xls and .xlsx)
+    df = None
+    if HAS_CALAMINE:
+        try:
+            df = pd.read_excel(filepath, sheet_name=0, header=None, engine='calamine')
+        except ValueError:
+            # pandas older than 2.2 rejects engine='calamine'; use its default reader
+            df = None
+    if df is None:
+        df = pd.read_excel(filepath, sheet_name=0, header=None)
+    
+    # Pull column 0 out once; table boundaries and titles are both keyed off it
+    first_col = get_first_column(df)
     
     # Find table boundaries
-    table_boundaries = find_table_boundaries(df)
+    table_boundaries = find_table_boundaries(df, first_col)
     
     if not table_boundaries:
         raise ValueError("No tables found in the file")
@@ -108,52 +164,43 @@ def parse_options_file(filepath: str) -> Tuple[List[str], pd.DataFrame]:
     
     months = get_months_from_first_table(first_table)
     
-    return months, df
+    return months, df, build_title_index(df, first_col)
 
-def find_table_for_month(df: pd.DataFrame, month: str, table_type: str) -> Tuple[pd.DataFrame, bool]:
+def find_table_for_month(df: pd.DataFrame, title_index: Dict[str, Tuple[int, int]],
+                         month: str, table_type: str) -> Tuple[pd.DataFrame, bool]:
     """
     Find and extract a specific table for a month (Calls or Puts).
     
     Args:
         df: Full dataframe
+        title_index: Title lookup built by build_title_index
         month: Month to search for (e.g., "MAR 26")
         table_type: Either "Calls" or "Puts"
     
     Returns:
         Tuple of (table_dataframe, found)
     """
-    search_text = f"{month} {table_type}"
+    location = title_index.get(f"{month} {table_type}")
+    if location is None:
+        return pd.DataFrame(), False
     
-    for idx, row in df.iterrows():
-        first_col_value = str(row.iloc[0]).strip() if pd.notna(row.iloc[0]) else ""
-        
-        if first_col_value == search_text:
-            # Found table title row (e.g., "MAR 26 Calls")
-            # The next row should be headers, then data starts after that
-            header_row_idx = idx + 1
-            data_start_idx = idx + 2
-            
-            # Find end of table (TOTALS or no data)
-            table_end = len(df) - 1
-            for end_idx in range(data_start_idx, len(df)):
-                end_col_value = str(df.iloc[end_idx, 0]).strip() if pd.notna(df.iloc[end_idx, 0]) else ""
-                if end_col_value == "TOTALS" or "No month data" in end_col_value:
-                    table_end = end_idx - 1
-                    break
-            
-            # Extract data rows (excluding title and header)
-            table = df.iloc[data_start_idx:table_end + 1].copy()
-            
-            # Set column names from the header row
-            table.columns = df.iloc[header_row_idx].values
-            table = table.reset_index(drop=True)
-            
-            # Remove rows that are all NaN or empty
-            table = table.dropna(how='all')
-            
-            return table, True
-    
-    return pd.DataFrame(), False
+    # Found table title row (e.g., "MAR 26 Calls")
+    # The next row should be headers, then data starts after that
+    idx, table_end = location
+    header_row_idx = idx + 1
+    data_start_idx = idx + 2
+    
+    # Extract data rows (excluding title and header)
+    table = df.iloc[data_start_idx:table_end + 1].copy()
+    
+    # Set column names from the header row
+    table.columns = df.iloc[header_row_idx].values
+    table = table.reset_index(drop=True)
+    
+    # Remove rows that are all NaN or empty
+    table = table.dropna(how='all')
+    
+    return table, True
 
 def filter_table_columns(table: pd.DataFrame) -> pd.DataFrame:
     """
@@ -179,6 +226,72 @@ def filter_table_columns(table: pd.DataFrame) -> pd.DataFrame:
     else:
         return table  # Return original if columns not found
 
+def run_parse(input_file: str = INPUT_FILE, choice: Optional[int] = None) -> pd.DataFrame:
+    """
+    Parse the options file and build the Calls/Puts strike and OI data for one month.
+    
+    Args:
+        input_file: Path to the exported options workbook
+        choice: 1-based month selection; prompts on stdin when omitted
+    
+    Returns:
+        DataFrame with OptionType, Strike and OI columns (empty if no data found)
+    """
+    # Parse the file
+    print(f"Reading file: {input_file}\n")
+    months, full_df, title_index = parse_options_file(input_file)
+    
+    # Display available months
+    print("Available Months:")
+    for i, month in enumerate(months, 1):
+        print(f"  {i}. {month}")
+    
+    # Get user selection
+    while choice is None or not 1 <= choice <= len(months):
+        if choice is not None:
+            print(f"Please enter a number between 1 and {len(months)}")
+        try:
+            choice = int(input(f"\nSelect month (1-{len(months)}): "))
+        except ValueError:
+            choice = None
+            print("Invalid input. Please enter a number.")
+    selected_month = months[choice - 1]
+    
+    # Extract Calls table
+    calls_table, calls_found = find_table_for_month(full_df, title_index, selected_month, "Calls")
+    
+    # Extract Puts table
+    puts_table, puts_found = find_table_for_month(full_df, title_index, selected_month, "Puts")
+    
+    # Collect (Strike, At Close) pairs for each option type
+    tables = []
+    if calls_found:
+        tables.append(('Call', filter_table_columns(calls_table).to_numpy()))
+    if puts_found:
+        tables.append(('Put', filter_table_columns(puts_table).to_numpy()))
+    
+    option_types = []
+    for option_type, values in tables:
+        option_types += [option_type] * len(values)
+    
+    if not option_types:
+        print(f"No data found for {selected_month}")
+        return pd.DataFrame(columns=['OptionType', 'Strike', 'OI'])
+    
+    csv_df = pd.DataFrame({
+        'OptionType': option_types,
+        'Strike': np.concatenate([values[:, 0] for _, values in tables]),
+        'OI': np.concatenate([values[:, 1] for _, values in tables])
+    })
+    
+    # Strip thousands separators so Strike/OI leave this stage as numbers
+    for col in ('Strike', 'OI'):
+        csv_df[col] = pd.to_numeric(csv_df[col].astype(str).str.replace(',', '', regex=False), errors='coerce')
+    
+    print(f"Selected month: {selected_month} ({len(csv_df)} rows)")
+    
+    return csv_df
+
 def main():
     """Main function to run the options parser."""
     # Check if input file exists
@@ -188,63 +301,12 @@ def main():
         return
     
     try:
-        # Parse the file
-        print(f"Reading file: {INPUT_FILE}\n")
-        months, full_df = parse_options_file(INPUT_FILE)
-        
-        # Display available months
-        print("Available Months:")
-        for i, month in enumerate(months, 1):
-            print(f"  {i}. {month}")
-        
-        # Get user selection
-        while True:
-            try:
-                choice = int(input(f"\nSelect month (1-{len(months)}): "))
-                if 1 <= choice <= len(months):
-                    selected_month = months[choice - 1]
-                    break
-                else:
-                    print(f"Please enter a number between 1 and {len(months)}")
-            except ValueError:
-                print("Invalid input. Please enter a number.")
+        csv_df = run_parse(INPUT_FILE)
         
-        # Extract Calls table
-        calls_table, calls_found = find_table_for_month(full_df, selected_month, "Calls")
-        
-        # Extract Puts table
-        puts_table, puts_found = find_table_for_month(full_df, selected_month, "Puts")
-        
-        # Prepare data for CSV
-        csv_data = []
-        
-        if calls_found:
-            calls_filtered = filter_table_columns(calls_table)
-            for idx, row in calls_filtered.iterrows():
-                csv_data.append({
-                    'OptionType': 'Call',
-                    'Strike': row.iloc[0],
-                    'OI': row.iloc[1]
-                })
-        
-        if puts_found:
-            puts_filtered = filter_table_columns(puts_table)
-            for idx, row in puts_filtered.iterrows():
-                csv_data.append({
-                    'OptionType': 'Put',
-                    'Strike': row.iloc[0],
-                    'OI': row.iloc[1]
-                })
-        
-        # Write to CSV
-        if csv_data:
-            csv_df = pd.DataFrame(csv_data)
+        # Write to CSV for calculate_gex.py
+        if not csv_df.empty:
             csv_df.to_csv('data.csv', index=False)
-            print(f"Data saved to data.csv ({len(csv_data)} rows)")
-            print(f"Selected month: {selected_month}")
-        else:
-            print(f"No data found for {selected_month}")
-    
+            print(f"Data saved to data.csv ({len(csv_df)} rows)")
     except FileNotFoundError as e:
         print(f"Error: {e}")
     except Exception as e:
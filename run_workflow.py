@@ -1,37 +1,14 @@
-import subprocess
-import sys
+from parse_options_data import INPUT_FILE, run_parse
+from calculate_gex import run_gex
 
-# Run parse_options_data.py with month 1 (MAR 26)
+# Parse options data with month 1 (MAR 26)
 print("Step 1: Extracting options data for MAR 26...")
 print("-" * 80)
+df = run_parse(INPUT_FILE, choice=1)
 
-process = subprocess.Popen(
-    [sys.executable, 'parse_options_data.py'],
-    stdin=subprocess.PIPE,
-    stdout=subprocess.PIPE,
-    stderr=subprocess.PIPE,
-    text=True
-)
-
-# Send choice "1" to select MAR 26
-stdout, stderr = process.communicate(input="1\n")
-print(stdout)
-if stderr:
-    print("STDERR:", stderr)
-
-# Run calculate_gex.py
+# Calculate and graph GEX on the parsed data in the same process
 print("\nStep 2: Calculating and graphing GEX...")
 print("-" * 80)
-process2 = subprocess.Popen(
-    [sys.executable, 'calculate_gex.py'],
-    stdout=subprocess.PIPE,
-    stderr=subprocess.PIPE,
-    text=True
-)
-
-stdout2, stderr2 = process2.communicate()
-print(stdout2)
-if stderr2:
-    print("STDERR:", stderr2)
+run_gex(df)
 
 print("\nWorkflow complete!")
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+import calculate_gex
+
+def test_numba_kernel_matches_vectorized_on_nan_and_zero_inputs():
+    pytest.importorskip("numba")
+    K = np.array([25000, 25600, np.nan, 0, 26000, 25800], dtype=np.float32)
+    OI = np.array([100, 0, 50, 75, np.nan, 200], dtype=np.float32)
+    sign = np.array([1, -1, 1, -1, 1, -1], dtype=np.float32)
+    args = (np.float32(calculate_gex.SPOT), np.float32(calculate_gex.IV),
+            np.float32(calculate_gex.T), np.float32(calculate_gex.MULT))
+    
+    expected = calculate_gex.calculate_signed_gex_vectorized(K, OI, sign, *args)
+    actual = calculate_gex.calculate_signed_gex_numba(K, OI, sign, *args)
+    
+    np.testing.assert_allclose(actual, expected, rtol=1e-5, equal_nan=True)
+
+def test_vectorized_matches_scalar_black_scholes_reference():
+    S, sigma, T, mult = calculate_gex.SPOT, calculate_gex.IV, calculate_gex.T, calculate_gex.MULT
+    K = np.array([24000.0, 25600.0, 25600.0, 27000.0])
+    OI = np.array([120.0, 0.0, 300.0, 45.0])
+    sign = np.array([1.0, 1.0, -1.0, -1.0])
+    
+    expected = [
+        s * calculate_gex.calculate_gamma(S, k, T=T, sigma=sigma) * oi * S * mult / 100
+        for k, oi, s in zip(K, OI, sign)
+    ]
+    actual = calculate_gex.calculate_signed_gex_vectorized(K, OI, sign, S, sigma, T, mult)
+    
+    np.testing.assert_allclose(actual, expected, rtol=1e-12)
+    assert actual[1] == 0.0
+    assert actual[2] < 0